@@ -0,0 +1,271 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from term_structure import to_timestamp
+from yield_tokenization_agent import YieldTokenizationAgent
+
+logger = logging.getLogger(__name__)
+
+TOKENS = ["PT-BTC", "PT-CORE", "YT-BTC", "YT-CORE"]
+
+# Snapshot column holding each token's price, and the yield YT holders accrue
+PRICE_COLUMNS = {
+    "PT-BTC": "pt_btc_price",
+    "PT-CORE": "pt_core_price",
+    "YT-BTC": "yt_btc_price",
+    "YT-CORE": "yt_core_price",
+}
+YIELD_COLUMNS = {
+    "YT-BTC": "btc_yield",
+    "YT-CORE": "core_yield",
+}
+REQUIRED_COLUMNS = sorted(set(PRICE_COLUMNS.values()) | set(YIELD_COLUMNS.values()))
+
+# Allocation that strategy actions are applied to at every rebalance
+DEFAULT_BASE_WEIGHTS = {token: 0.25 for token in TOKENS}
+
+Snapshots = Union[pd.DataFrame, List[Dict], Dict[str, Sequence[float]]]
+
+
+def _to_frame(snapshots: Snapshots) -> pd.DataFrame:
+    frame = snapshots if isinstance(snapshots, pd.DataFrame) else pd.DataFrame(snapshots)
+    missing = [col for col in REQUIRED_COLUMNS if col not in frame.columns]
+    if missing:
+        raise ValueError(f"Snapshots are missing columns: {missing}")
+    if len(frame) < 2:
+        raise ValueError("At least two snapshots are required to backtest")
+    return frame.reset_index(drop=True)
+
+
+def strategy_weights(strategy: Dict, base_weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Convert a strategy's buy/sell actions into target portfolio weights.
+
+    Sells free up the given percentage of a token's base weight; the freed
+    value is spread over the buys in proportion to their percentages, or held
+    as cash if the strategy has no buys.
+
+    Args:
+        strategy: Strategy dictionary with an "actions" list
+        base_weights: Allocation the actions are applied to
+
+    Returns:
+        Array of weights ordered as TOKENS followed by cash
+    """
+    base = base_weights or DEFAULT_BASE_WEIGHTS
+    weights = np.array([base.get(token, 0.0) for token in TOKENS] + [0.0])
+    freed = 0.0
+    buys = {}
+    for action in strategy.get("actions", []):
+        token = action.get("token")
+        if token not in TOKENS:
+            continue
+        pct = action.get("percentage", 0) / 100
+        idx = TOKENS.index(token)
+        if action.get("action") == "sell":
+            freed += weights[idx] * pct
+            weights[idx] *= 1 - pct
+        elif action.get("action") == "buy":
+            buys[idx] = buys.get(idx, 0.0) + pct
+    total_buy = sum(buys.values())
+    if total_buy > 0:
+        for idx, pct in buys.items():
+            weights[idx] += freed * pct / total_buy
+    else:
+        weights[-1] += freed
+    return weights
+
+
+def _asset_returns(frame: pd.DataFrame, periods_per_year: float) -> np.ndarray:
+    """Per-period simple returns for each token, including YT yield accrual."""
+    prices = frame[[PRICE_COLUMNS[token] for token in TOKENS]].to_numpy(dtype=float)
+    carry = np.zeros_like(prices)
+    for i, token in enumerate(TOKENS):
+        if token in YIELD_COLUMNS:
+            carry[:, i] = frame[YIELD_COLUMNS[token]].to_numpy(dtype=float) / periods_per_year
+    return (prices[1:] + carry[:-1]) / prices[:-1] - 1
+
+
+def _snapshot_timestamps(frame: pd.DataFrame, periods_per_year: float) -> np.ndarray:
+    """Observation time of each snapshot in seconds: as_of if present, else evenly spaced."""
+    if "as_of" in frame.columns:
+        return np.array([to_timestamp(value) for value in frame["as_of"]])
+    return np.arange(len(frame)) * (365 * 86400 / periods_per_year)
+
+
+def run_backtest(
+    snapshots: Snapshots,
+    user_profile: Optional[Dict] = None,
+    rebalance_every: int = 30,
+    initial_value: float = 10000.0,
+    fee_bps: float = 0.0,
+    strategy_name: Optional[str] = None,
+    base_weights: Optional[Dict[str, float]] = None,
+    periods_per_year: float = 365.0,
+) -> Dict[str, Any]:
+    """
+    Replay market snapshots through YieldTokenizationAgent and track the portfolio.
+
+    The agent's yield forecasters are fed every snapshot, but strategies are
+    only selected at rebalance points; portfolio values between them are
+    computed for all snapshots at once.
+
+    Args:
+        snapshots: Market snapshots with btc_yield, core_yield and PT/YT prices,
+            and optionally an as_of observation time
+        user_profile: Profile passed to the agent
+        rebalance_every: Number of snapshots between rebalances
+        initial_value: Starting portfolio value
+        fee_bps: Trading fee charged on turnover at each rebalance
+        strategy_name: Follow a fixed strategy template instead of the recommendation
+        base_weights: Allocation strategy actions are applied to
+        periods_per_year: Snapshots per year, used to accrue YT yield and to
+            space snapshots in time when there is no as_of column
+
+    Returns:
+        Dictionary with portfolio values, drawdowns and summary statistics
+    """
+    frame = _to_frame(snapshots)
+    returns = _asset_returns(frame, periods_per_year)
+    n_periods = len(returns)
+    rebalance_every = max(1, int(rebalance_every))
+    starts = np.arange(0, n_periods, rebalance_every)
+
+    agent = YieldTokenizationAgent(user_profile)
+    agent_logger = logging.getLogger(YieldTokenizationAgent.__module__)
+    previous_level = agent_logger.level
+    agent_logger.setLevel(logging.WARNING)
+    chosen = []
+    seg_weights = np.empty((len(starts), len(TOKENS) + 1))
+    btc_yields = frame["btc_yield"].to_numpy(dtype=float)
+    core_yields = frame["core_yield"].to_numpy(dtype=float)
+    timestamps = _snapshot_timestamps(frame, periods_per_year)
+    try:
+        recorded = 0
+        for k, start in enumerate(starts):
+            # The forecasters see every snapshot, the strategy only rebalance points
+            for i in range(recorded, start + 1):
+                agent.record_yields(btc_yields[i], core_yields[i], timestamps[i])
+            recorded = start + 1
+            # The row was just recorded; without as_of the load doesn't record it again
+            snapshot = frame.iloc[start].to_dict()
+            snapshot.pop("as_of", None)
+            agent.load_market_data(snapshot)
+            strategy = _select_strategy(agent, strategy_name)
+            chosen.append({"index": int(start), "strategy": strategy["name"]})
+            seg_weights[k] = strategy_weights(strategy, base_weights)
+    finally:
+        agent_logger.setLevel(previous_level)
+
+    # Growth of each asset since the start of the segment it falls in
+    growth = np.vstack([np.ones(len(TOKENS)), np.cumprod(1 + returns, axis=0)])
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n_periods)))
+    since_start = growth[1:] / growth[starts][segment]
+    weights = seg_weights[segment]
+    drifted = np.hstack([weights[:, :-1] * since_start, weights[:, -1:]])
+    multiplier = drifted.sum(axis=1)
+
+    # Fees on the turnover needed to move from drifted to target weights
+    ends = np.append(starts[1:], n_periods) - 1
+    end_mix = drifted[ends] / multiplier[ends, None]
+    turnover = np.abs(seg_weights[1:] - end_mix[:-1]).sum(axis=1)
+    fee = np.concatenate([[0.0], turnover * fee_bps / 10000])
+    seg_start_value = initial_value * np.cumprod(np.concatenate([[1.0], multiplier[ends][:-1]])) * np.cumprod(1 - fee)
+
+    values = np.concatenate([[initial_value], seg_start_value[segment] * multiplier])
+    peak = np.maximum.accumulate(values)
+    drawdown = values / peak - 1
+
+    return {
+        "user_profile": agent.user_profile,
+        "values": values,
+        "drawdown": drawdown,
+        "final_value": float(values[-1]),
+        "total_return": float(values[-1] / initial_value - 1),
+        "max_drawdown": float(drawdown.min()),
+        "rebalances": chosen,
+    }
+
+
+def _select_strategy(agent: YieldTokenizationAgent, strategy_name: Optional[str]) -> Dict:
+    if strategy_name is None:
+        return agent.recommend_strategy()["recommended"]
+    for strategy in agent._generate_potential_strategies():
+        if strategy["name"] == strategy_name:
+            return strategy
+    raise ValueError(f"Unknown strategy: {strategy_name}")
+
+
+def _run_profile(args):
+    snapshots, profile, kwargs = args
+    return run_backtest(snapshots, profile, **kwargs)
+
+
+def sweep_profiles(
+    snapshots: Snapshots,
+    profiles: List[Dict],
+    processes: Optional[int] = None,
+    **kwargs,
+) -> List[Dict[str, Any]]:
+    """
+    Backtest many user profiles in parallel worker processes.
+
+    Args:
+        snapshots: Market snapshots shared by every run
+        profiles: User profiles to evaluate
+        processes: Number of worker processes (defaults to one per CPU)
+        **kwargs: Forwarded to run_backtest
+
+    Returns:
+        Backtest results in the same order as profiles
+    """
+    frame = _to_frame(snapshots)
+    logger.info(f"Backtesting {len(profiles)} profiles over {len(frame)} snapshots")
+    if processes == 1 or len(profiles) <= 1:
+        return [run_backtest(frame, profile, **kwargs) for profile in profiles]
+    processes = processes or os.cpu_count() or 1
+    chunksize = max(1, len(profiles) // (4 * processes))
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_run_profile, [(frame, p, kwargs) for p in profiles], chunksize=chunksize))
+
+
+# Example usage
+if __name__ == "__main__":
+    import itertools
+    import time
+
+    rng = np.random.default_rng(0)
+    days = 3 * 365
+    btc_yield = np.clip(0.045 + np.cumsum(rng.normal(0, 0.0005, days)), 0.005, None)
+    core_yield = np.clip(0.078 + np.cumsum(rng.normal(0, 0.0008, days)), 0.005, None)
+    # Single maturity at the end of the series: PT pulls to par, YT decays to zero
+    years_to_maturity = np.arange(days, 0, -1) / 365
+    pt_btc = (1 + btc_yield) ** -years_to_maturity
+    pt_core = (1 + core_yield) ** -years_to_maturity
+    snapshots = pd.DataFrame({
+        "btc_yield": btc_yield,
+        "core_yield": core_yield,
+        "pt_btc_price": pt_btc,
+        "pt_core_price": pt_core,
+        "yt_btc_price": 1 - pt_btc,
+        "yt_core_price": 1 - pt_core,
+    })
+    profiles = [
+        {"risk_tolerance": risk, "investment_horizon": horizon, "financial_goal": goal}
+        for risk, horizon, goal in itertools.product(
+            ["low", "medium", "high"],
+            ["short", "medium", "long"],
+            ["capital_preservation", "balanced_growth", "high_growth", "income_generation"],
+        )
+    ]
+
+    started = time.perf_counter()
+    results = sweep_profiles(snapshots, profiles, rebalance_every=7, fee_bps=10)
+    print(f"{len(profiles)} profiles x {days} days in {time.perf_counter() - started:.2f}s")
+    for result in sorted(results, key=lambda r: r["total_return"], reverse=True)[:5]:
+        print(result["user_profile"], f"return={result['total_return']:.2%}", f"max_dd={result['max_drawdown']:.2%}")
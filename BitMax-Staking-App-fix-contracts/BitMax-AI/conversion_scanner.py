@@ -0,0 +1,236 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sortedcontainers import SortedList
+
+logger = logging.getLogger(__name__)
+
+# (user, maturity) pair to submit to YTAutoConverter.executeConversion
+Trigger = Tuple[str, int]
+
+
+class ConversionScanner:
+    """
+    Keeper-side index of YTAutoConverter thresholds.
+
+    Mirrors the contract state (userConfigs, conversionExecuted) and keeps, per
+    maturity, the pending users sorted by thresholdPrice, so each price update
+    only has to walk the prefix of the index below the new price.
+
+    This is stricter than the contract. On-chain, canExecuteConversion and
+    executeConversion only check that the user is enabled, that the pair was
+    not executed and that the oracle's single per-token threshold is reached.
+    That threshold is whatever the most recent configure(true, ...) caller
+    set. They ignore the user's own thresholdPrice and maturity list.
+    The scanner reports a pair only when both hold: the oracle gate is open
+    (price >= oracle_threshold), so the call won't revert with
+    ThresholdNotReached, and the user's thresholdPrice is reached for a
+    maturity they registered. Pairs the contract would accept outside the
+    user's configuration are not reported. Oracle price staleness is not
+    modelled.
+    """
+
+    def __init__(self):
+        self.user_configs: Dict[str, Dict] = {}
+        self.conversion_executed: Set[Trigger] = set()
+        # Oracle threshold for the reference token; None means no active threshold
+        self.oracle_threshold: Optional[int] = None
+        self.last_price: Optional[int] = None
+        self._gate_was_open = False
+        # maturity => SortedList of (thresholdPrice, user) for enabled, unexecuted pairs
+        self._index: Dict[int, SortedList] = {}
+        # Pairs indexed by an event with threshold <= last_price; a price scan
+        # would never reach them, so the next on_price_update reports them
+        self._queued: Dict[Trigger, None] = {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict) -> "ConversionScanner":
+        """
+        Build a scanner from a snapshot of contract state.
+
+        Args:
+            snapshot: Dictionary with "user_configs" (user => {enabled,
+                thresholdPrice, maturities}), "oracle_threshold" (the oracle's
+                current threshold for the reference token) and optionally
+                "conversion_executed" (user => list of executed maturities)
+
+        Returns:
+            Populated ConversionScanner
+        """
+        scanner = cls()
+        if snapshot.get("oracle_threshold") is not None:
+            scanner.oracle_threshold = int(snapshot["oracle_threshold"])
+        for user, maturities in snapshot.get("conversion_executed", {}).items():
+            scanner.conversion_executed.update((user, int(m)) for m in maturities)
+        for user, config in snapshot.get("user_configs", {}).items():
+            scanner.user_configs[user] = {
+                "enabled": bool(config.get("enabled", False)),
+                "thresholdPrice": int(config.get("thresholdPrice", 0)),
+                "maturities": [int(m) for m in config.get("maturities", [])],
+            }
+            scanner._index_user(user)
+        logger.info(f"Loaded {len(scanner.user_configs)} users into conversion scanner")
+        return scanner
+
+    def _pending_pairs(self, user: str) -> Iterable[Tuple[int, int]]:
+        config = self.user_configs.get(user)
+        if not config or not config["enabled"]:
+            return []
+        return [
+            (maturity, config["thresholdPrice"])
+            for maturity in config["maturities"]
+            if (user, maturity) not in self.conversion_executed
+        ]
+
+    def _index_user(self, user: str, previous: Iterable[Tuple[int, int]] = ()) -> None:
+        previous = set(previous)
+        for maturity, threshold in self._pending_pairs(user):
+            self._index.setdefault(maturity, SortedList()).add((threshold, user))
+            if (maturity, threshold) not in previous and self.last_price is not None and threshold <= self.last_price:
+                self._queued[(user, maturity)] = None
+
+    def _unindex_user(self, user: str) -> List[Tuple[int, int]]:
+        pairs = self._pending_pairs(user)
+        for maturity, threshold in pairs:
+            self._discard(maturity, threshold, user)
+        return pairs
+
+    def _discard(self, maturity: int, threshold: int, user: str) -> None:
+        entries = self._index.get(maturity)
+        if entries is None:
+            return
+        entries.discard((threshold, user))
+        if not entries:
+            del self._index[maturity]
+
+    # Contract state updates, one per YTAutoConverter event
+
+    def configure(self, user: str, enabled: bool, threshold_price: int) -> None:
+        """Apply a UserConfigUpdated event (enabling also overwrites the oracle threshold)."""
+        previous = self._unindex_user(user)
+        config = self.user_configs.setdefault(user, {"enabled": False, "thresholdPrice": 0, "maturities": []})
+        config["enabled"] = bool(enabled)
+        config["thresholdPrice"] = int(threshold_price)
+        self._index_user(user, previous)
+        if enabled:
+            # configure() calls oracle.setThreshold(referenceToken, _thresholdPrice)
+            self.oracle_threshold = int(threshold_price)
+
+    def set_oracle_threshold(self, threshold: Optional[int]) -> None:
+        """Record a threshold change made on the oracle directly (None = inactive)."""
+        self.oracle_threshold = None if threshold is None else int(threshold)
+
+    def add_maturity(self, user: str, maturity: int) -> None:
+        """Apply a MaturityAdded event."""
+        maturity = int(maturity)
+        previous = self._unindex_user(user)
+        config = self.user_configs.setdefault(user, {"enabled": False, "thresholdPrice": 0, "maturities": []})
+        if maturity not in config["maturities"]:
+            config["maturities"].append(maturity)
+        self.conversion_executed.discard((user, maturity))
+        self._index_user(user, previous)
+
+    def remove_maturity(self, user: str, maturity: int) -> None:
+        """Apply a MaturityRemoved event."""
+        maturity = int(maturity)
+        config = self.user_configs.get(user)
+        if not config or maturity not in config["maturities"]:
+            return
+        self._discard(maturity, config["thresholdPrice"], user)
+        config["maturities"].remove(maturity)
+
+    def mark_executed(self, user: str, maturity: int) -> None:
+        """Apply a ConversionExecuted event."""
+        maturity = int(maturity)
+        config = self.user_configs.get(user)
+        if config:
+            self._discard(maturity, config["thresholdPrice"], user)
+        self.conversion_executed.add((user, maturity))
+
+    def reset_conversion(self, user: str, maturity: int) -> None:
+        """Apply a ConversionReset event."""
+        maturity = int(maturity)
+        previous = self._unindex_user(user)
+        self.conversion_executed.discard((user, maturity))
+        self._index_user(user, previous)
+
+    # Queries
+
+    def _gate_open(self, price: int) -> bool:
+        return self.oracle_threshold is not None and price >= self.oracle_threshold
+
+    def can_execute_conversion(self, user: str, maturity: int, price: int) -> bool:
+        """
+        Whether the scanner would report (user, maturity) at the given oracle price.
+
+        Combines the contract's canExecuteConversion check (enabled, not
+        executed, oracle threshold reached) with the user's own thresholdPrice
+        and maturity list; see the class docstring.
+        """
+        config = self.user_configs.get(user)
+        if not config or not config["enabled"] or (user, int(maturity)) in self.conversion_executed:
+            return False
+        if not self._gate_open(price):
+            return False
+        return int(maturity) in config["maturities"] and price >= config["thresholdPrice"]
+
+    def executable(self, price: int, maturities: Optional[Iterable[int]] = None) -> List[Trigger]:
+        """
+        Return every pending (user, maturity) whose threshold is at or below price.
+
+        Returns nothing while the oracle threshold is not reached.
+
+        Args:
+            price: Oracle price (scaled by 10^8)
+            maturities: Restrict the scan to these maturities
+
+        Returns:
+            List of (user, maturity) pairs, lowest thresholds first per maturity
+        """
+        if not self._gate_open(price):
+            return []
+        return self._scan(None, price, maturities)
+
+    def on_price_update(self, price: int) -> List[Trigger]:
+        """
+        Record a new oracle price and return the pairs it newly made executable.
+
+        While the oracle gate stays open, user thresholds in (last_price, price]
+        are returned, plus pairs that events (configure, add_maturity,
+        reset_conversion) made executable since the last update; pairs already
+        reported are left to executable(). When the gate opens with this
+        update, every pair executable at price is returned.
+
+        Args:
+            price: New oracle price (scaled by 10^8)
+
+        Returns:
+            List of (user, maturity) pairs whose threshold was crossed
+        """
+        previous = self.last_price
+        gate_was_open = self._gate_was_open
+        queued, self._queued = self._queued, {}
+        self.last_price = price
+        self._gate_was_open = self._gate_open(price)
+        if not self._gate_was_open:
+            return []
+        if not gate_was_open or previous is None:
+            return self._scan(None, price, None)
+        triggers = self._scan(previous, price, None) if price > previous else []
+        seen = set(triggers)
+        triggers.extend(
+            pair for pair in queued
+            if pair not in seen and self.can_execute_conversion(pair[0], pair[1], price)
+        )
+        return triggers
+
+    def _scan(self, low: Optional[int], high: int, maturities: Optional[Iterable[int]]) -> List[Trigger]:
+        keys = self._index if maturities is None else [int(m) for m in maturities if int(m) in self._index]
+        triggers = []
+        for maturity in keys:
+            entries = self._index[maturity]
+            # Tuples compare on threshold first; (t, "") sorts before any user at t
+            start = 0 if low is None else entries.bisect_left((low + 1, ""))
+            stop = entries.bisect_left((high + 1, ""))
+            triggers.extend((user, maturity) for _, user in entries.islice(start, stop))
+        return triggers
@@ -0,0 +1,290 @@
+# data_fetcher.py
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Upstream market data API. Point BITMAX_UPSTREAM_URL at a local stub server
+# (or call configure(transport=httpx.MockTransport(...))) to run without network.
+DEFAULT_BASE_URL = "https://api.coingecko.com/api/v3"
+
+# Public coin ids used by the API routes mapped to the upstream ids
+COIN_ID_ALIASES = {
+    "core": "coredaoorg",
+}
+
+# Reference annual yields used to derive PT/YT prices from spot data
+BASE_YIELDS = {
+    "btc": 0.045,
+    "core": 0.078,
+}
+
+DEFAULT_DEADLINE = 10.0     # seconds per public call, across all retries
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.25  # seconds
+DEFAULT_BACKOFF_CAP = 4.0    # seconds
+DEFAULT_RATE = 0.5           # requests per second per upstream host
+DEFAULT_BURST = 5
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# Last good responses kept as a fallback; keys include caller-supplied
+# parameters (e.g. history days), so the cache is a bounded LRU
+MAX_FALLBACK_ENTRIES = 128
+
+
+class FetchError(Exception):
+    """Raised when upstream data cannot be fetched and no cached value exists."""
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it."""
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_config = {
+    "base_url": os.environ.get("BITMAX_UPSTREAM_URL", DEFAULT_BASE_URL),
+    "rate": float(os.environ.get("BITMAX_UPSTREAM_RATE", DEFAULT_RATE)),
+    "burst": int(os.environ.get("BITMAX_UPSTREAM_BURST", DEFAULT_BURST)),
+    "max_retries": DEFAULT_MAX_RETRIES,
+    "deadline": DEFAULT_DEADLINE,
+    "transport": None,
+}
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_buckets: Dict[str, TokenBucket] = {}
+_last_good: "OrderedDict[Tuple[str, Tuple], Tuple[float, Any]]" = OrderedDict()
+
+
+def configure(**options) -> None:
+    """
+    Override fetcher settings (base_url, rate, burst, max_retries, deadline, transport).
+
+    Resets the shared client and rate limiters so the new settings take effect
+    on the next call.
+    """
+    unknown = set(options) - set(_config)
+    if unknown:
+        raise ValueError(f"Unknown fetcher options: {sorted(unknown)}")
+    _config.update(options)
+    _buckets.clear()
+    _discard_client()
+
+
+def share_rate_limit(processes: int) -> None:
+    """
+    Give this process its share of the upstream rate limit.
+
+    Rate limiters are per process, so processes that call the same upstream
+    (e.g. pre-forked server workers) each take 1/processes of the rate and
+    burst to keep the combined request rate within the configured limit.
+    """
+    if processes > 1:
+        configure(rate=_config["rate"] / processes, burst=max(1, _config["burst"] // processes))
+
+
+def _discard_client() -> None:
+    global _client, _client_loop
+    client = _client
+    _client = None
+    _client_loop = None
+    if client is not None and not client.is_closed:
+        try:
+            asyncio.get_running_loop().create_task(client.aclose())
+        except RuntimeError:
+            # No running loop: the old loop owns the connections, let them be GC'd
+            pass
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client, recreating it if the event loop changed."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _discard_client()
+        _client = httpx.AsyncClient(
+            base_url=_config["base_url"],
+            transport=_config["transport"],
+            timeout=httpx.Timeout(_config["deadline"]),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+            headers={"Accept": "application/json"},
+        )
+        _client_loop = loop
+    return _client
+
+
+def _get_bucket(host: str) -> TokenBucket:
+    bucket = _buckets.get(host)
+    if bucket is None:
+        bucket = _buckets[host] = TokenBucket(_config["rate"], _config["burst"])
+    return bucket
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(DEFAULT_BACKOFF_CAP, DEFAULT_BACKOFF_BASE * (2 ** attempt)))
+
+
+async def close() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+async def _get_json(path: str, params: Optional[Dict] = None, deadline: Optional[float] = None) -> Any:
+    """
+    GET a JSON resource with rate limiting, retries and a per-call deadline.
+
+    Falls back to the last successful response for the same request if the
+    upstream cannot be reached before the deadline.
+    """
+    params = params or {}
+    cache_key = (path, tuple(sorted(params.items())))
+    budget = deadline if deadline is not None else _config["deadline"]
+    expires = time.monotonic() + budget
+    client = _get_client()
+    bucket = _get_bucket(urlsplit(str(client.base_url)).netloc)
+    last_error: Optional[Exception] = None
+
+    for attempt in range(_config["max_retries"] + 1):
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            await asyncio.wait_for(bucket.acquire(), remaining)
+            remaining = expires - time.monotonic()
+            response = await client.get(path, params=params, timeout=max(remaining, 0.001))
+            if response.status_code in RETRYABLE_STATUS:
+                raise httpx.HTTPStatusError(
+                    f"Upstream returned {response.status_code}", request=response.request, response=response
+                )
+            response.raise_for_status()
+            data = response.json()
+            _last_good[cache_key] = (time.time(), data)
+            _last_good.move_to_end(cache_key)
+            while len(_last_good) > MAX_FALLBACK_ENTRIES:
+                _last_good.popitem(last=False)
+            return data
+        except httpx.HTTPStatusError as e:
+            last_error = e
+            if e.response.status_code not in RETRYABLE_STATUS:
+                break
+            retry_after = e.response.headers.get("Retry-After")
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else _backoff_delay(attempt)
+        except (httpx.TransportError, asyncio.TimeoutError, ValueError) as e:
+            # ValueError: a body that isn't JSON, e.g. an HTML error page served with 200
+            last_error = e
+            delay = _backoff_delay(attempt)
+
+        if attempt == _config["max_retries"] or time.monotonic() + delay >= expires:
+            break
+        logger.warning(f"Retrying {path} in {delay:.2f}s after error: {last_error}")
+        await asyncio.sleep(delay)
+
+    cached = _last_good.get(cache_key)
+    if cached is not None:
+        fetched_at, data = cached
+        logger.warning(f"Serving cached {path} from {time.time() - fetched_at:.0f}s ago: {last_error}")
+        return data
+    raise FetchError(f"Failed to fetch {path}: {last_error or 'deadline exceeded'}")
+
+
+def _upstream_id(coin_id: str) -> str:
+    return COIN_ID_ALIASES.get(coin_id, coin_id)
+
+
+async def get_coin_data(coin_id: str, deadline: Optional[float] = None) -> Dict:
+    """Fetch current market data for a coin."""
+    return await _get_json(
+        f"/coins/{_upstream_id(coin_id)}",
+        {
+            "localization": "false",
+            "tickers": "false",
+            "community_data": "false",
+            "developer_data": "false",
+        },
+        deadline,
+    )
+
+
+async def get_coin_history(coin_id: str, days: int = 30, deadline: Optional[float] = None) -> Dict:
+    """Fetch price history for a coin as {'prices': [[timestamp_ms, price], ...], ...}."""
+    return await _get_json(
+        f"/coins/{_upstream_id(coin_id)}/market_chart",
+        {"vs_currency": "usd", "days": str(days)},
+        deadline,
+    )
+
+
+async def fetch_live_data(deadline: Optional[float] = None) -> Dict:
+    """
+    Fetch live market data and derive PT/YT prices and liquidity.
+
+    Returns the keys used by the RL environment (pt_price, yt_price,
+    pt_liquidity, yt_liquidity) as well as the per-asset fields consumed by
+    YieldTokenizationAgent.load_market_data.
+
+    Only spot prices and volumes are live. There is no upstream yield
+    source: btc_yield/core_yield are the static BASE_YIELDS and the PT/YT
+    prices are derived from them as one-year zero-coupon prices.
+    """
+    ids = [_upstream_id("bitcoin"), _upstream_id("core")]
+    quotes = await _get_json(
+        "/simple/price",
+        {"ids": ",".join(ids), "vs_currencies": "usd", "include_24hr_vol": "true"},
+        deadline,
+    )
+    btc, core = quotes.get(ids[0], {}), quotes.get(ids[1], {})
+
+    pt_btc_price = 1 / (1 + BASE_YIELDS["btc"])
+    pt_core_price = 1 / (1 + BASE_YIELDS["core"])
+    # Liquidity expressed in units of the underlying traded over 24h
+    btc_liquidity = btc.get("usd_24h_vol", 0.0) / btc["usd"] if btc.get("usd") else 0.0
+    core_liquidity = core.get("usd_24h_vol", 0.0) / core["usd"] if core.get("usd") else 0.0
+
+    return {
+        "pt_price": pt_btc_price,
+        "yt_price": 1 - pt_btc_price,
+        "pt_liquidity": btc_liquidity,
+        "yt_liquidity": btc_liquidity * (1 - pt_btc_price),
+        "btc_price": btc.get("usd", 0.0),
+        "core_price": core.get("usd", 0.0),
+        "btc_yield": BASE_YIELDS["btc"],
+        "core_yield": BASE_YIELDS["core"],
+        "pt_btc_price": pt_btc_price,
+        "pt_core_price": pt_core_price,
+        "yt_btc_price": 1 - pt_btc_price,
+        "yt_core_price": 1 - pt_core_price,
+        "core_liquidity": core_liquidity,
+    }
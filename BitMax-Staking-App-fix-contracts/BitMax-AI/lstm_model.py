@@ -1,10 +1,12 @@
 # lstm_model.py
 import numpy as np
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense
-from sklearn.preprocessing import MinMaxScaler
+
+# TensorFlow and scikit-learn are imported inside the functions that need them
+# so importing this module stays cheap until a model is actually built.
 
 def preprocess_data(data):
+    from sklearn.preprocessing import MinMaxScaler
+
     prices = np.array([x[1] for x in data['prices']])
     scaler = MinMaxScaler(feature_range=(0, 1))
     scaled_prices = scaler.fit_transform(prices.reshape(-1, 1))
@@ -20,6 +22,9 @@ def preprocess_data(data):
     return X, y, scaler
 
 def build_lstm_model(input_shape):
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import LSTM, Dense
+
     model = Sequential()
     model.add(LSTM(units=50, return_sequences=True, input_shape=input_shape))
     model.add(LSTM(units=50, return_sequences=False))
@@ -28,8 +33,7 @@ def build_lstm_model(input_shape):
     model.compile(optimizer='adam', loss='mean_squared_error')
     return model
 
-async def train_lstm(coin_id: str, fetch_historical_data):
-    data = await fetch_historical_data(coin_id)
+def fit_lstm(data):
     X, y, scaler = preprocess_data(data)
     
     model = build_lstm_model((X.shape[1], 1))
@@ -37,6 +41,10 @@ async def train_lstm(coin_id: str, fetch_historical_data):
     
     return model, scaler
 
+async def train_lstm(coin_id: str, fetch_historical_data):
+    data = await fetch_historical_data(coin_id)
+    return fit_lstm(data)
+
 def predict_yield(model, scaler, last_60_days):
     last_60_days_scaled = scaler.transform(last_60_days.reshape(-1, 1))
     X_test = np.array([last_60_days_scaled])
@@ -1,31 +1,178 @@
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import time
+_import_started = time.perf_counter()
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
+import functools
+import gc
 import json
+import multiprocessing
+import os
+import pickle
 import re
+import shutil
+import signal
+import tempfile
+import threading
 import numpy as np
 import asyncio
-from lstm_model import train_lstm, predict_yield
-from rl_agent import train_rl_agent, optimize_split
-from data_fetcher import fetch_live_data, get_coin_history, get_coin_data
+from data_fetcher import fetch_live_data, get_coin_history, get_coin_data, close as close_fetcher, share_rate_limit
+from inference_cache import InferenceCache, fingerprint
+
+# lstm_model and rl_agent pull in TensorFlow, scikit-learn, gym and
+# stable-baselines3; they are imported on first model use via ml_modules().
+STARTUP_IMPORT_SECONDS = time.perf_counter() - _import_started
 
 lstm_model = None
 scaler = None
 rl_model = None
 
+# Files written by export_lstm and export_rl_model
+LSTM_EXPORT = "lstm.pkl"
+RL_EXPORT = "rl_policy.pkl"
+
+# Pre-forked workers that exit sooner than this after starting are restarted
+# with exponential backoff instead of immediately
+WORKER_MIN_UPTIME = 10.0      # seconds
+WORKER_RESTART_BACKOFF = 1.0  # seconds, doubled per consecutive early exit
+WORKER_RESTART_BACKOFF_CAP = 30.0
+# Bumped whenever models are (re)loaded; part of every inference cache key
+model_version = 0
+
+# Results of predict_yield/optimize_split for identical inputs and model version
+inference_cache = InferenceCache(maxsize=int(os.environ.get("BITMAX_INFERENCE_CACHE_SIZE", 256)))
+
+# Data-only workers serve the /coins/* routes and never load the ML stacks
+DATA_ONLY = os.environ.get("BITMAX_DATA_ONLY", "").lower() in ("1", "true", "yes")
+
+# LSTM inference precision: float32 serves the Keras model, float16/int8 serve
+# quantized weights through quantized_lstm
+LSTM_PRECISION = os.environ.get("BITMAX_LSTM_PRECISION", "float32")
+
+# Most recent 60-day windows the quantized model is checked against float32 on
+QUANTIZATION_REPORT_WINDOWS = 30
+
+@functools.lru_cache(maxsize=None)
+def ml_modules():
+    started = time.perf_counter()
+    import lstm_model as lstm
+    import rl_agent as rl
+    print(f"ML modules imported in {time.perf_counter() - started:.2f}s")
+    return lstm, rl
+
+# One event loop for the whole process, running on a background thread.
+# Request threads submit coroutines to it instead of spinning up their own loop,
+# so the pooled upstream client and rate limiters in data_fetcher are shared.
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+def get_event_loop():
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="async-loop", daemon=True)
+            _loop_thread.start()
+    return _loop
+
+def stop_event_loop():
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            return
+        _loop.call_soon_threadsafe(_loop.stop)
+        _loop_thread.join()
+        _loop.close()
+        _loop = None
+        _loop_thread = None
+
 def run_async(coro):
-    return asyncio.get_event_loop().run_until_complete(coro)
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
 
-def initialize_models():
-    global lstm_model, scaler, rl_model
-    lstm_model, scaler = run_async(train_lstm("bitcoin", get_coin_history))
+async def fetch_optimize_inputs():
+    # Independent upstream calls, fetched concurrently
+    return await asyncio.gather(fetch_live_data(), get_coin_history("bitcoin", days=60))
+
+def train_lstm_model():
+    import lstm_model as lstm
+    if LSTM_PRECISION == "float32":
+        return run_async(lstm.train_lstm("bitcoin", get_coin_history))
+    history = run_async(get_coin_history("bitcoin"))
+    model, model_scaler = lstm.fit_lstm(history)
+    return quantize_lstm(model, model_scaler, [x[1] for x in history['prices']]), model_scaler
+
+def train_rl_model():
+    import rl_agent as rl
     market_data = run_async(fetch_live_data())
-    rl_model = train_rl_agent(market_data)
+    return rl.train_rl_agent(market_data)
+
+def initialize_models():
+    global lstm_model, scaler, rl_model, model_version
+    ml_modules()
+    lstm_model, scaler = train_lstm_model()
+    rl_model = train_rl_model()
+    model_version += 1
+    inference_cache.clear()
     print("Models initialized successfully")
 
+def quantize_lstm(model, scaler, prices):
+    from quantized_lstm import QuantizedLSTM, accuracy_report
+    quantized = QuantizedLSTM.from_keras(model, LSTM_PRECISION)
+    # Same network in both precisions, so the error is quantization error alone
+    report = accuracy_report(model, quantized, scaler, prices, windows=QUANTIZATION_REPORT_WINDOWS)
+    print(f"Serving {LSTM_PRECISION} LSTM weights: "
+          f"{report['weight_bytes']} bytes (float32: {report['reference_weight_bytes']}), "
+          f"MAE {report['mae']:.4f} / max {report['max_abs_error']:.4f} vs float32 over the last {report['windows']} windows, "
+          f"{report['latency_ms']:.1f}ms per prediction (float32: {report['reference_latency_ms']:.1f}ms)")
+    return quantized
+
+# export_lstm and export_rl_model run in spawned processes, one each, so the
+# server process never starts the TensorFlow or torch runtimes (and the two
+# runtimes never share a process).
+
+def export_lstm(directory, lstm_precision):
+    """Train the LSTM and write it, with its scaler, as a NumPy QuantizedLSTM."""
+    global LSTM_PRECISION
+    LSTM_PRECISION = lstm_precision
+    from quantized_lstm import QuantizedLSTM
+    model, model_scaler = train_lstm_model()
+    if not isinstance(model, QuantizedLSTM):
+        # float32 NumPy inference matches Keras to rounding
+        model = QuantizedLSTM.from_keras(model, "float32")
+    with open(os.path.join(directory, LSTM_EXPORT), "wb") as f:
+        pickle.dump({"lstm_model": model, "scaler": model_scaler}, f)
+    run_async(close_fetcher())
+    stop_event_loop()
+
+def export_rl_model(directory):
+    """Train the PPO agent and write its deterministic policy as a NumpyPolicy."""
+    from numpy_policy import NumpyPolicy
+    policy = NumpyPolicy.from_sb3(train_rl_model())
+    with open(os.path.join(directory, RL_EXPORT), "wb") as f:
+        pickle.dump(policy, f)
+    run_async(close_fetcher())
+    stop_event_loop()
+
+def load_exported_models(directory):
+    global lstm_model, scaler, rl_model, model_version
+    with open(os.path.join(directory, LSTM_EXPORT), "rb") as f:
+        exported = pickle.load(f)
+    with open(os.path.join(directory, RL_EXPORT), "rb") as f:
+        policy = pickle.load(f)
+    lstm_model = exported["lstm_model"]
+    scaler = exported["scaler"]
+    rl_model = policy
+    model_version += 1
+    inference_cache.clear()
+    print(f"Loaded exported models ({lstm_model.nbytes + rl_model.nbytes} bytes of weights)")
+
 def cleanup_models():
     global lstm_model, scaler, rl_model
     lstm_model = None
     scaler = None
     rl_model = None
+    inference_cache.clear()
     print("Models cleaned up")
 
 class CryptoHandler(BaseHTTPRequestHandler):
@@ -129,25 +276,40 @@ class CryptoHandler(BaseHTTPRequestHandler):
                 self._send_error(f"Failed to fetch history for bitcoin: {str(e)}")
             return
 
+        if self.path == '/cache/stats':
+            # Each --workers process has its own cache, so these counters are for the
+            # worker that answered; pid tells the workers apart
+            self._send_json_response(dict(inference_cache.stats(), model_version=model_version, pid=os.getpid()))
+            return
+
         self._send_error("Not found", 404)
 
     def do_POST(self):
         if self.path == '/optimize':
             try:
                 global lstm_model, scaler, rl_model
+                if DATA_ONLY:
+                    self._send_error("Optimization is not available on data-only workers", 503)
+                    return
                 if not lstm_model or not scaler or not rl_model:
                     self._send_error("Models not initialized", 500)
                     return
 
                 user_data = self._read_request_body()
-                market_data = run_async(fetch_live_data())
-                last_60_days = np.array([x[1] for x in run_async(get_coin_history("bitcoin", days=60))['prices']])
-                predicted_yield = predict_yield(lstm_model, scaler, last_60_days)
-                pt_split, yt_split = optimize_split(rl_model, market_data)
+                market_data, history = run_async(fetch_optimize_inputs())
+                last_60_days = np.array([x[1] for x in history['prices']])
+                lstm, rl = ml_modules()
+                predicted_yield = inference_cache.get_or_compute(
+                    fingerprint("predict_yield", model_version, last_60_days),
+                    lambda: float(lstm.predict_yield(lstm_model, scaler, last_60_days)))
+                observation = tuple(float(market_data[k]) for k in ('pt_price', 'yt_price', 'pt_liquidity', 'yt_liquidity'))
+                split = inference_cache.get_or_compute(
+                    fingerprint("optimize_split", model_version, observation),
+                    lambda: rl.optimize_split(rl_model, market_data))
                 self._send_json_response({
                     "recommended_split": {
-                        "PT": pt_split,
-                        "YT": yt_split
+                        "PT": split["pt_split"],
+                        "YT": split["yt_split"]
                     },
                     "predicted_yield": predicted_yield
                 })
@@ -157,10 +319,19 @@ class CryptoHandler(BaseHTTPRequestHandler):
 
         self._send_error("Not found", 404)
 
-def run_server(host='localhost', port=8000):
+def run_server(host='localhost', port=8000, data_only=None, lstm_precision=None):
+    global DATA_ONLY, LSTM_PRECISION
+    if data_only is not None:
+        DATA_ONLY = data_only
+    if lstm_precision is not None:
+        LSTM_PRECISION = lstm_precision
     try:
-        initialize_models()
-        server = HTTPServer((host, port), CryptoHandler)
+        print(f"Startup imports took {STARTUP_IMPORT_SECONDS:.3f}s")
+        if DATA_ONLY:
+            print("Data-only mode: skipping model initialization")
+        else:
+            initialize_models()
+        server = ThreadingHTTPServer((host, port), CryptoHandler)
         print(f"Server running at http://{host}:{port}")
         try:
             server.serve_forever()
@@ -168,10 +339,140 @@ def run_server(host='localhost', port=8000):
             pass
         finally:
             server.server_close()
+            run_async(close_fetcher())
+            stop_event_loop()
             cleanup_models()
             print("Server stopped")
     except Exception as e:
         print(f"Failed to start server: {str(e)}")
 
+def run_prefork_server(host='localhost', port=8000, workers=None, data_only=None, lstm_precision=None):
+    """
+    Serve with several pre-forked worker processes sharing one listening socket.
+
+    TensorFlow and torch are not fork-safe once their thread pools exist, and
+    a copy per worker is what prefork is meant to avoid, so neither the parent
+    nor the workers import them: the models are trained in spawned processes
+    and exported as NumPy models (see export_lstm and export_rl_model). The
+    parent loads those before forking, so workers share the weights
+    copy-on-write.
+
+    Each worker takes 1/workers of the upstream rate limit. Workers that die
+    are restarted, with backoff if they keep exiting soon after starting.
+    POSIX only.
+    """
+    global DATA_ONLY, LSTM_PRECISION
+    if data_only is not None:
+        DATA_ONLY = data_only
+    if lstm_precision is not None:
+        LSTM_PRECISION = lstm_precision
+    workers = workers or os.cpu_count() or 1
+    print(f"Startup imports took {STARTUP_IMPORT_SECONDS:.3f}s")
+    export_dir = tempfile.mkdtemp(prefix="bitmax-models-")
+    try:
+        if DATA_ONLY:
+            print("Data-only mode: skipping model initialization")
+        else:
+            context = multiprocessing.get_context("spawn")
+            trainers = [
+                context.Process(target=export_lstm, args=(export_dir, LSTM_PRECISION), name="lstm-trainer"),
+                context.Process(target=export_rl_model, args=(export_dir,), name="rl-trainer"),
+            ]
+            for trainer in trainers:
+                trainer.start()
+            for trainer in trainers:
+                trainer.join()
+            failed = [f"{t.name} exited with code {t.exitcode}" for t in trainers if t.exitcode != 0]
+            if failed:
+                raise RuntimeError(", ".join(failed))
+            load_exported_models(export_dir)
+            # Torch-free now that rl_agent imports stable-baselines3 lazily; import
+            # before forking so workers share the modules too
+            ml_modules()
+
+        # Threads do not survive fork: drop the event loop and pooled connections,
+        # each worker recreates them on first use.
+        run_async(close_fetcher())
+        stop_event_loop()
+
+        server = ThreadingHTTPServer((host, port), CryptoHandler)
+    except Exception as e:
+        print(f"Failed to start server: {str(e)}")
+        return
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+    # Move everything allocated so far out of the GC's reach so collections in
+    # the workers don't touch (and copy) the shared model pages.
+    gc.freeze()
+
+    children = {}  # pid => start time
+    stopping = False
+    early_exits = 0
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles Ctrl-C
+            try:
+                share_rate_limit(workers)
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children[pid] = time.monotonic()
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for _ in range(workers):
+        spawn()
+    print(f"Server running at http://{host}:{port} with {workers} workers")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        if pid not in children:
+            # e.g. the multiprocessing resource tracker started for the trainers
+            continue
+        uptime = time.monotonic() - children.pop(pid)
+        if stopping:
+            continue
+        early_exits = early_exits + 1 if uptime < WORKER_MIN_UPTIME else 0
+        delay = min(WORKER_RESTART_BACKOFF_CAP, WORKER_RESTART_BACKOFF * 2 ** (early_exits - 1)) if early_exits else 0
+        print(f"Worker {pid} exited with status {status}, restarting in {delay:.0f}s")
+        restart_at = time.monotonic() + delay
+        while not stopping and time.monotonic() < restart_at:
+            time.sleep(max(0.0, min(0.5, restart_at - time.monotonic())))
+        if not stopping:
+            spawn()
+
+    server.server_close()
+    cleanup_models()
+    print("Server stopped")
+
 if __name__ == "__main__":
-    run_server()
+    parser = argparse.ArgumentParser(description="BitMax AI server")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data-only", action="store_true", default=None,
+                        help="serve /coins/* routes only, without loading the ML models")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of pre-forked worker processes (0 = one per CPU)")
+    parser.add_argument("--lstm-precision", choices=["float32", "float16", "int8"], default=None,
+                        help="LSTM inference precision (default: BITMAX_LSTM_PRECISION or float32)")
+    args = parser.parse_args()
+    if args.workers == 1:
+        run_server(args.host, args.port, args.data_only, args.lstm_precision)
+    else:
+        run_prefork_server(args.host, args.port, args.workers or None, args.data_only, args.lstm_precision)
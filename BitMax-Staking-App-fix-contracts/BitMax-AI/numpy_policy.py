@@ -0,0 +1,61 @@
+# numpy_policy.py
+import numpy as np
+
+ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0),
+}
+
+
+class NumpyPolicy:
+    """
+    NumPy inference for the deterministic action of a stable-baselines3 MlpPolicy.
+
+    Exposes predict(obs, deterministic=True) like PPO.predict, so it can be
+    passed to rl_agent.optimize_split in its place without importing torch.
+    Only the actor (policy network and action head) is kept.
+    """
+
+    def __init__(self, layers, low, high):
+        self.layers = layers
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def from_sb3(cls, model):
+        policy = model.policy
+        if getattr(policy, "squash_output", False):
+            raise ValueError("Squashed (tanh) action outputs are not supported")
+        layers = []
+        modules = list(policy.mlp_extractor.policy_net) + [policy.action_net]
+        for module in modules:
+            kind = type(module).__name__
+            if kind == "Linear":
+                layers.append((
+                    "linear",
+                    # Stored as (in, out) so inference is x @ weight
+                    module.weight.detach().cpu().numpy().T.astype(np.float32),
+                    module.bias.detach().cpu().numpy().astype(np.float32),
+                ))
+            elif kind in ACTIVATIONS:
+                layers.append((kind, None, None))
+            else:
+                raise ValueError(f"Unsupported policy layer for NumPy inference: {kind}")
+        space = model.action_space
+        return cls(layers, np.asarray(space.low, dtype=np.float32), np.asarray(space.high, dtype=np.float32))
+
+    @property
+    def nbytes(self):
+        return sum(w.nbytes + b.nbytes for kind, w, b in self.layers if kind == "linear")
+
+    def predict(self, obs, deterministic=True, **kwargs):
+        if not deterministic:
+            raise ValueError("NumpyPolicy only serves the deterministic action")
+        x = np.asarray(obs, dtype=np.float32)
+        single = x.ndim == 1
+        x = x.reshape(1, -1) if single else x.reshape(len(x), -1)
+        for kind, weight, bias in self.layers:
+            x = x @ weight + bias if kind == "linear" else ACTIVATIONS[kind](x)
+        # PPO.predict clips the Gaussian mean to the action space bounds
+        action = np.clip(x, self.low, self.high)
+        return (action[0] if single else action), None
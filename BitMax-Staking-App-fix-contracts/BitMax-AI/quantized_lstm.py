@@ -0,0 +1,164 @@
+# quantized_lstm.py
+import time
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+class QuantizedTensor:
+    """Weight tensor stored as float16, or int8 with a symmetric per-tensor scale."""
+
+    def __init__(self, weights, precision):
+        weights = np.asarray(weights, dtype=np.float32)
+        self.precision = precision
+        if precision == "int8":
+            max_abs = float(np.abs(weights).max())
+            self.scale = max_abs / 127 if max_abs > 0 else 1.0
+            self.values = np.clip(np.round(weights / self.scale), -127, 127).astype(np.int8)
+        elif precision == "float16":
+            self.scale = 1.0
+            self.values = weights.astype(np.float16)
+        else:
+            self.scale = 1.0
+            self.values = weights
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def dequantize(self):
+        return self.values.astype(np.float32) * np.float32(self.scale)
+
+    def matmul(self, x):
+        # Multiply in float32 and apply the scale to the (smaller) output
+        return (x @ self.values.astype(np.float32)) * np.float32(self.scale)
+
+
+class QuantizedLSTM:
+    """
+    NumPy inference for the LSTM/Dense stack built by build_lstm_model.
+
+    Exposes predict(X) with the same input/output shapes as the Keras model,
+    so it can be passed to predict_yield in its place.
+    """
+
+    def __init__(self, layers, precision):
+        self.layers = layers
+        self.precision = precision
+
+    @classmethod
+    def from_keras(cls, model, precision="int8"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}")
+        layers = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            weights = layer.get_weights()
+            if kind == "LSTM":
+                kernel, recurrent_kernel, bias = weights
+                layers.append({
+                    "type": "lstm",
+                    "kernel": QuantizedTensor(kernel, precision),
+                    "recurrent_kernel": QuantizedTensor(recurrent_kernel, precision),
+                    # Biases are tiny; keeping them in float32 costs nothing
+                    "bias": np.asarray(bias, dtype=np.float32),
+                    "units": recurrent_kernel.shape[0],
+                    "return_sequences": bool(getattr(layer, "return_sequences", False)),
+                })
+            elif kind == "Dense":
+                kernel, bias = weights
+                layers.append({
+                    "type": "dense",
+                    "kernel": QuantizedTensor(kernel, precision),
+                    "bias": np.asarray(bias, dtype=np.float32),
+                })
+            elif weights:
+                raise ValueError(f"Unsupported layer type for quantized inference: {kind}")
+        return cls(layers, precision)
+
+    @property
+    def nbytes(self):
+        total = 0
+        for layer in self.layers:
+            for value in layer.values():
+                if isinstance(value, QuantizedTensor):
+                    total += value.nbytes
+                elif isinstance(value, np.ndarray):
+                    total += value.nbytes
+        return total
+
+    def _run_lstm(self, layer, x):
+        batch, steps, _ = x.shape
+        units = layer["units"]
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        # Input projection for all timesteps at once; only the recurrence is sequential
+        projected = layer["kernel"].matmul(x.reshape(batch * steps, -1)).reshape(batch, steps, -1) + layer["bias"]
+        # Weights stay quantized at rest; dequantize once per call, not per timestep
+        recurrent_kernel = layer["recurrent_kernel"].dequantize()
+        outputs = []
+        for t in range(steps):
+            z = projected[:, t] + h @ recurrent_kernel
+            # Keras gate order: input, forget, cell, output
+            i = _sigmoid(z[:, :units])
+            f = _sigmoid(z[:, units:2 * units])
+            g = np.tanh(z[:, 2 * units:3 * units])
+            o = _sigmoid(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+            if layer["return_sequences"]:
+                outputs.append(h)
+        return np.stack(outputs, axis=1) if layer["return_sequences"] else h
+
+    def predict(self, X, **kwargs):
+        x = np.asarray(X, dtype=np.float32)
+        for layer in self.layers:
+            if layer["type"] == "lstm":
+                x = self._run_lstm(layer, x)
+            else:
+                x = layer["kernel"].matmul(x) + layer["bias"]
+        return x
+
+
+def accuracy_report(reference_model, quantized_model, scaler, prices, window=60, windows=30):
+    """
+    Compare quantized predictions with the float32 model it was quantized from.
+
+    Runs predict_yield with both models on each of the last `windows` sliding
+    windows of `prices` and reports the prediction error and per-call latency.
+    Both models share weights up to quantization, so the windows need not be
+    unseen by training.
+    """
+    from lstm_model import predict_yield
+
+    prices = np.asarray(prices, dtype=np.float64)
+    starts = range(max(0, len(prices) - window - windows + 1), len(prices) - window + 1)
+    samples = [prices[s:s + window] for s in starts]
+    if not samples:
+        raise ValueError(f"Need at least {window} prices for an accuracy report")
+
+    def run(model):
+        started = time.perf_counter()
+        predictions = np.array([predict_yield(model, scaler, w) for w in samples])
+        return predictions, (time.perf_counter() - started) / len(samples)
+
+    reference, reference_latency = run(reference_model)
+    quantized, quantized_latency = run(quantized_model)
+    error = np.abs(quantized - reference)
+    reference_bytes = sum(w.nbytes for w in reference_model.get_weights()) if hasattr(reference_model, "get_weights") else None
+
+    return {
+        "precision": quantized_model.precision,
+        "windows": len(samples),
+        "mae": float(error.mean()),
+        "max_abs_error": float(error.max()),
+        "mean_relative_error": float((error / np.maximum(np.abs(reference), 1e-12)).mean()),
+        "weight_bytes": quantized_model.nbytes,
+        "reference_weight_bytes": reference_bytes,
+        "latency_ms": quantized_latency * 1000,
+        "reference_latency_ms": reference_latency * 1000,
+    }
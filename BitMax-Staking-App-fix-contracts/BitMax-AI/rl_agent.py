@@ -2,8 +2,9 @@
 import numpy as np
 import gym
 from gym import spaces
-from stable_baselines3 import PPO
-from stable_baselines3.common.env_util import make_vec_env
+
+# stable-baselines3 (and with it torch) is imported inside train_rl_agent, so
+# serving a NumpyPolicy through optimize_split never loads torch.
 
 class PTYTEnv(gym.Env):
     def __init__(self, market_data):
@@ -50,6 +51,9 @@ class PTYTEnv(gym.Env):
         return self.state, reward, done, {}
 
 def train_rl_agent(market_data):
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.env_util import make_vec_env
+
     env = make_vec_env(lambda: PTYTEnv(market_data), n_envs=1)
     model = PPO('MlpPolicy', env, verbose=1)
     model.learn(total_timesteps=10000)
@@ -64,8 +68,8 @@ def optimize_split(model, market_data):
         float(market_data['yt_liquidity'])
     ], dtype=np.float32)
 
-    # Get the model's prediction
-    action, _ = model.predict(obs)
+    # Get the model's prediction; deterministic so the same inputs give the same split
+    action, _ = model.predict(obs, deterministic=True)
     
     # Ensure the result is JSON serializable by converting to native Python floats
     result = {
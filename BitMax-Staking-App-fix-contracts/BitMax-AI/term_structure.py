@@ -0,0 +1,197 @@
+import functools
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Nelson-Siegel decay parameter, in years
+DEFAULT_TAU_SCALE = 1.0
+
+# Shortest time to maturity priced, so expired or same-day maturities stay finite
+MIN_YEARS = 1 / 365
+
+# Parallel shifts applied to the underlying yield when pricing YT scenarios
+DEFAULT_SCENARIOS = {
+    "bear": -0.01,
+    "base": 0.0,
+    "bull": 0.01,
+}
+
+# PT quotes above par imply negative rates; allow a little rounding noise only
+MAX_PT_PRICE = 1.0 + 1e-6
+
+# Cap on annualized ROI; YT ROI grows without bound as the YT price goes to 0
+MAX_ANNUAL_ROI = 1.0
+
+Maturity = Union[str, int, float, datetime, np.datetime64]
+
+
+class YieldCurve:
+    """
+    Nelson-Siegel zero curve implied by PT prices (continuously compounded).
+
+    Outside the range of quoted maturities the curve is extrapolated flat.
+    """
+
+    def __init__(
+        self,
+        betas: Sequence[float],
+        tau_scale: float = DEFAULT_TAU_SCALE,
+        quoted_years: Optional[Tuple[float, float]] = None,
+    ):
+        self.betas = np.asarray(betas, dtype=float)
+        self.tau_scale = tau_scale
+        self.quoted_years = quoted_years
+
+    def zero_rates(self, years: np.ndarray) -> np.ndarray:
+        """Implied annual zero rate for each time to maturity."""
+        years = np.maximum(np.asarray(years, dtype=float), MIN_YEARS)
+        if self.quoted_years is not None:
+            years = np.clip(years, *self.quoted_years)
+        basis = _basis(years, self.tau_scale)
+        return basis[:, :len(self.betas)] @ self.betas
+
+    def pt_prices(self, years: np.ndarray) -> np.ndarray:
+        """Fair PT price per unit of face value for each time to maturity."""
+        years = np.maximum(np.asarray(years, dtype=float), MIN_YEARS)
+        return np.exp(-self.zero_rates(years) * years)
+
+
+def _basis(years: np.ndarray, tau_scale: float) -> np.ndarray:
+    x = years / tau_scale
+    slope = (1 - np.exp(-x)) / x
+    return np.column_stack([np.ones_like(x), slope, slope - np.exp(-x)])
+
+
+def years_to_maturity(maturities: Sequence[Maturity], as_of: Optional[Maturity] = None) -> np.ndarray:
+    """
+    Convert maturities to years from as_of.
+
+    Args:
+        maturities: ISO dates, datetimes or unix timestamps (as used on-chain)
+        as_of: Valuation time, defaults to today (UTC midnight)
+
+    Returns:
+        Array of times to maturity in years
+    """
+    dates = np.array([_to_datetime64(m) for m in maturities], dtype="datetime64[s]")
+    now = _to_datetime64(as_of if as_of is not None else np.datetime64("today"))
+    return (dates - now).astype(float) / (365 * 24 * 3600)
+
+
+def to_timestamp(value: Maturity) -> float:
+    """Unix timestamp in seconds for an ISO date, datetime or timestamp."""
+    return float(_to_datetime64(value).astype("int64"))
+
+
+def _to_datetime64(value: Maturity) -> np.datetime64:
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return np.datetime64(int(value), "s")
+    return np.datetime64(value, "s")
+
+
+@functools.lru_cache(maxsize=256)
+def _fit_cached(years: Tuple[float, ...], prices: Tuple[float, ...], tau_scale: float) -> YieldCurve:
+    years_arr = np.maximum(np.array(years), MIN_YEARS)
+    rates = -np.log(np.array(prices)) / years_arr
+    # Use only as many factors as the data supports: level, then slope, then curvature
+    n_factors = min(3, len(np.unique(years_arr)))
+    basis = _basis(years_arr, tau_scale)[:, :n_factors]
+    betas, *_ = np.linalg.lstsq(basis, rates, rcond=None)
+    return YieldCurve(betas, tau_scale, (float(years_arr.min()), float(years_arr.max())))
+
+
+def fit_curve(
+    years: Sequence[float],
+    prices: Sequence[float],
+    tau_scale: float = DEFAULT_TAU_SCALE,
+) -> YieldCurve:
+    """
+    Fit a yield curve to PT prices across maturities.
+
+    Fits are cached on their inputs, so refitting the same snapshot is free.
+
+    Args:
+        years: Time to maturity of each PT, in years
+        prices: PT price per unit of face value for each maturity
+        tau_scale: Nelson-Siegel decay parameter
+
+    Returns:
+        Fitted YieldCurve
+    """
+    if len(years) != len(prices) or len(years) == 0:
+        raise ValueError("years and prices must be non-empty and the same length")
+    bad = [p for p in prices if not valid_pt_price(p)]
+    if bad:
+        raise ValueError(f"PT prices must be finite and in (0, {MAX_PT_PRICE}], got {bad}")
+    return _fit_cached(
+        tuple(float(y) for y in years),
+        tuple(float(p) for p in prices),
+        float(tau_scale),
+    )
+
+
+def valid_pt_price(price: float) -> bool:
+    """Whether a PT quote can be turned into an implied yield."""
+    return bool(np.isfinite(price)) and 0 < price <= MAX_PT_PRICE
+
+
+def flat_curve(annual_yield: float) -> YieldCurve:
+    """Flat curve at an annually compounded yield, used when no PT prices are quoted."""
+    return YieldCurve([np.log1p(annual_yield)])
+
+
+def annualize(gross: np.ndarray, years: np.ndarray) -> np.ndarray:
+    """Compounded annual ROI of a gross return earned over years, capped at MAX_ANNUAL_ROI."""
+    with np.errstate(divide="ignore"):
+        log_rate = np.log(np.maximum(gross, 0.0)) / years
+    return np.expm1(np.minimum(log_rate, np.log1p(MAX_ANNUAL_ROI)))
+
+
+def period_return(annual_roi: np.ndarray, years: np.ndarray) -> np.ndarray:
+    """Return over years of an annually compounded ROI."""
+    return np.expm1(np.log1p(annual_roi) * years)
+
+
+def price_term_structure(
+    curve: YieldCurve,
+    years: np.ndarray,
+    underlying_yield: float,
+    shifts: Sequence[float],
+) -> Dict[str, np.ndarray]:
+    """
+    Price PT/YT and their hold-to-maturity ROI for every maturity and scenario.
+
+    PT ROI is the curve's implied yield. YT ROI is what the yield stream
+    (underlying_yield plus the scenario shift) returns on the YT price. Both
+    are compounded to annual rates and capped at MAX_ANNUAL_ROI.
+
+    Args:
+        curve: Fitted yield curve
+        years: Time to maturity of each maturity, in years
+        underlying_yield: Current annual yield of the underlying asset
+        shifts: Parallel yield shifts, one per scenario
+
+    Returns:
+        Dictionary of arrays shaped (scenarios, maturities), ROI annualized
+    """
+    years = np.maximum(np.asarray(years, dtype=float), MIN_YEARS)
+    shifts = np.asarray(shifts, dtype=float)[:, None]
+
+    pt_price = curve.pt_prices(years)[None, :]
+    yt_price = 1 - pt_price
+    pt_roi = annualize(1 / pt_price, years)
+    realized = np.maximum(underlying_yield + shifts, 0.0)
+    yt_payoff = period_return(realized, years)
+    yt_roi = annualize(yt_payoff / np.maximum(yt_price, 1e-12), years)
+
+    n_scenarios = shifts.shape[0]
+    return {
+        "pt_price": np.broadcast_to(pt_price, (n_scenarios, len(years))),
+        "yt_price": np.broadcast_to(yt_price, (n_scenarios, len(years))),
+        "pt_roi": np.broadcast_to(pt_roi, (n_scenarios, len(years))),
+        "yt_roi": yt_roi,
+    }
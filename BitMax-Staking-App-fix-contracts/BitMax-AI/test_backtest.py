@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+from yield_forecaster import YieldForecaster
+
+
+def snapshots(n):
+    years = np.arange(n, 0, -1) / 365
+    pt_btc = 1.045 ** -years
+    pt_core = 1.078 ** -years
+    return pd.DataFrame({
+        "btc_yield": np.full(n, 0.045),
+        "core_yield": np.full(n, 0.078),
+        "pt_btc_price": pt_btc,
+        "pt_core_price": pt_core,
+        "yt_btc_price": 1 - pt_btc,
+        "yt_core_price": 1 - pt_core,
+    })
+
+
+@pytest.fixture
+def updates(monkeypatch):
+    seen = []
+    original = YieldForecaster.update
+
+    def update(self, value, timestamp=None):
+        seen.append(timestamp)
+        original(self, value, timestamp)
+
+    monkeypatch.setattr(YieldForecaster, "update", update)
+    return seen
+
+
+def test_hourly_snapshots_are_spaced_by_periods_per_year(updates):
+    backtest.run_backtest(snapshots(48), rebalance_every=12, periods_per_year=8760)
+    btc = updates[::2]
+    assert np.allclose(np.diff(btc), 3600)
+
+
+def test_as_of_column_is_used_and_rows_recorded_once(updates):
+    frame = snapshots(40)
+    frame["as_of"] = pd.date_range("2026-01-01", periods=40, freq="h")
+    backtest.run_backtest(frame, rebalance_every=10, periods_per_year=8760)
+    btc = updates[::2]
+    # Rows 0..30 (up to the last rebalance point), each exactly once
+    assert len(btc) == 31
+    assert btc[0] == pd.Timestamp("2026-01-01").timestamp()
+    assert np.allclose(np.diff(btc), 3600)
+
+
+def test_strategy_weights_move_sold_weight_to_buys_or_cash():
+    swap = {"actions": [
+        {"action": "sell", "token": "YT-BTC", "percentage": 50},
+        {"action": "buy", "token": "PT-BTC", "percentage": 100},
+    ]}
+    assert np.allclose(backtest.strategy_weights(swap), [0.375, 0.25, 0.125, 0.25, 0.0])
+    sell_only = {"actions": [{"action": "sell", "token": "PT-CORE", "percentage": 100}]}
+    assert np.allclose(backtest.strategy_weights(sell_only), [0.25, 0.0, 0.25, 0.25, 0.25])
@@ -0,0 +1,96 @@
+import random
+
+from conversion_scanner import ConversionScanner
+
+
+def scanner(oracle_threshold=100, **configs):
+    return ConversionScanner.from_snapshot({
+        "oracle_threshold": oracle_threshold,
+        "user_configs": {
+            user: {"enabled": True, "thresholdPrice": threshold, "maturities": maturities}
+            for user, (threshold, maturities) in configs.items()
+        },
+    })
+
+
+def test_nothing_is_executable_below_the_oracle_threshold():
+    s = scanner(oracle_threshold=300, a=(100, [1]))
+    assert s.executable(250) == []
+    assert s.on_price_update(250) == []
+    assert s.on_price_update(300) == [("a", 1)]
+
+
+def test_crossings_are_reported_once():
+    s = scanner(a=(150, [1, 2]), b=(180, [2]))
+    assert s.on_price_update(90) == []
+    assert sorted(s.on_price_update(200)) == [("a", 1), ("a", 2), ("b", 2)]
+    assert s.on_price_update(210) == []
+    assert sorted(s.executable(210)) == [("a", 1), ("a", 2), ("b", 2)]
+
+
+def test_pairs_enabled_between_ticks_are_reported():
+    s = scanner(a=(100, [1]))
+    assert s.on_price_update(150) == [("a", 1)]
+    s.configure("b", True, 120)
+    s.add_maturity("b", 1)
+    assert s.can_execute_conversion("b", 1, 150)
+    assert s.on_price_update(150) == [("b", 1)]
+    assert s.on_price_update(151) == []
+
+    s.mark_executed("a", 1)
+    s.reset_conversion("a", 1)
+    assert s.on_price_update(140) == [("a", 1)]
+
+
+def test_executed_and_removed_pairs_are_not_reported():
+    s = scanner(a=(100, [1, 2]))
+    s.mark_executed("a", 1)
+    s.remove_maturity("a", 2)
+    assert s.on_price_update(500) == []
+    assert not s.can_execute_conversion("a", 1, 500)
+
+
+def test_matches_brute_force_under_random_events():
+    rng = random.Random(7)
+    users = [f"0x{i}" for i in range(200)]
+    s = ConversionScanner.from_snapshot({
+        "oracle_threshold": 500,
+        "user_configs": {
+            u: {"enabled": rng.random() < 0.9, "thresholdPrice": rng.randint(1, 1000), "maturities": rng.sample([1, 2, 3], 2)}
+            for u in users
+        },
+    })
+
+    def brute(price):
+        return {
+            (u, m) for u, c in s.user_configs.items() for m in c["maturities"]
+            if s.can_execute_conversion(u, m, price)
+        }
+
+    reported = set()
+    for _ in range(2000):
+        u = rng.choice(users)
+        op = rng.random()
+        if op < 0.1:
+            s.configure(u, rng.random() < 0.8, rng.randint(1, 1000))
+        elif op < 0.2:
+            s.add_maturity(u, rng.choice([1, 2, 3, 4]))
+        elif op < 0.3 and s.user_configs[u]["maturities"]:
+            s.remove_maturity(u, rng.choice(s.user_configs[u]["maturities"]))
+        elif op < 0.4 and s.user_configs[u]["maturities"]:
+            s.mark_executed(u, rng.choice(s.user_configs[u]["maturities"]))
+        elif op < 0.5:
+            s.reset_conversion(u, rng.choice([1, 2, 3, 4]))
+        elif op < 0.55:
+            s.set_oracle_threshold(rng.randint(1, 1000))
+        else:
+            price = rng.randint(1, 1000)
+            new = s.on_price_update(price)
+            executable = brute(price)
+            assert len(new) == len(set(new))
+            assert set(new) <= executable
+            reported |= set(new)
+            assert executable <= reported
+            # Pairs that stop being executable have to be reported again later
+            reported &= executable
+            assert sorted(s.executable(price)) == sorted(executable)
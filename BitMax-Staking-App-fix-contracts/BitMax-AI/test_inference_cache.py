@@ -0,0 +1,57 @@
+import threading
+
+import numpy as np
+
+from inference_cache import InferenceCache, fingerprint
+
+
+def test_fingerprint_depends_on_values_dtype_and_shape():
+    prices = np.arange(6, dtype=np.float64)
+    assert fingerprint("predict_yield", 1, prices) == fingerprint("predict_yield", 1, prices.copy())
+    assert fingerprint("predict_yield", 1, prices) != fingerprint("predict_yield", 2, prices)
+    assert fingerprint(prices) != fingerprint(prices.astype(np.float32))
+    assert fingerprint(prices) != fingerprint(prices.reshape(2, 3))
+    assert fingerprint(prices) != fingerprint(prices + 1e-9)
+
+
+def test_hits_misses_and_lru_eviction():
+    cache = InferenceCache(maxsize=2)
+    calls = []
+
+    def compute(key):
+        return lambda: calls.append(key) or key
+
+    assert cache.get_or_compute("a", compute("a")) == "a"
+    assert cache.get_or_compute("b", compute("b")) == "b"
+    assert cache.get_or_compute("a", compute("a")) == "a"
+    cache.get_or_compute("c", compute("c"))  # evicts b, the least recently used
+    cache.get_or_compute("a", compute("a"))
+    cache.get_or_compute("b", compute("b"))
+    assert calls == ["a", "b", "c", "b"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 4, 2)
+    assert stats["hit_rate"] == 2 / 6
+
+
+def test_clear_drops_entries():
+    cache = InferenceCache()
+    cache.get_or_compute("a", lambda: 1)
+    cache.clear()
+    assert cache.get_or_compute("a", lambda: 2) == 2
+
+
+def test_concurrent_lookups_are_counted():
+    cache = InferenceCache(maxsize=8)
+
+    def worker():
+        for i in range(200):
+            cache.get_or_compute(i % 4, lambda: i % 4)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 1600
+    assert stats["size"] == 4
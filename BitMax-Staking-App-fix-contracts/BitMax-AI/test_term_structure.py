@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from term_structure import (
+    MAX_ANNUAL_ROI,
+    annualize,
+    fit_curve,
+    flat_curve,
+    period_return,
+    price_term_structure,
+    years_to_maturity,
+)
+
+
+def test_annualize_compounds():
+    assert annualize(np.array([1.21]), np.array([2.0]))[0] == pytest.approx(0.10)
+    assert period_return(np.array([0.10]), np.array([2.0]))[0] == pytest.approx(0.21)
+
+
+def test_fit_curve_rejects_non_positive_quotes():
+    with pytest.raises(ValueError):
+        fit_curve([0.5, 1.0], [0.98, 0.0])
+    with pytest.raises(ValueError):
+        fit_curve([1.0], [1.2])
+
+
+def test_curve_is_flat_beyond_quoted_maturities():
+    curve = fit_curve([0.2, 0.7, 1.2], [0.995, 0.97, 0.95])
+    last = curve.zero_rates(np.array([1.2]))[0]
+    assert curve.zero_rates(np.array([2.2, 5.0])) == pytest.approx([last, last])
+    first = curve.zero_rates(np.array([0.2]))[0]
+    assert curve.zero_rates(np.array([0.05]))[0] == pytest.approx(first)
+
+
+def test_cheap_yt_roi_is_capped():
+    curve = fit_curve([0.2, 1.2], [0.995, 0.95])
+    priced = price_term_structure(curve, np.array([0.2, 1.2]), 0.045, [0.0])
+    assert np.all(priced["yt_roi"] <= MAX_ANNUAL_ROI + 1e-12)
+    assert priced["yt_roi"][0, 0] == pytest.approx(MAX_ANNUAL_ROI)
+    assert np.all(np.isfinite(priced["pt_roi"]))
+
+
+def test_flat_curve_prices_at_the_yield():
+    priced = price_term_structure(flat_curve(0.05), np.array([1.0, 2.0]), 0.05, [0.0])
+    assert priced["pt_price"][0] == pytest.approx([1 / 1.05, 1 / 1.05 ** 2])
+    assert priced["pt_roi"][0] == pytest.approx([0.05, 0.05])
+
+
+def test_years_to_maturity_is_negative_when_expired():
+    years = years_to_maturity(["2026-01-01", "2027-01-01"], "2026-07-02")
+    assert years[0] < 0 < years[1]
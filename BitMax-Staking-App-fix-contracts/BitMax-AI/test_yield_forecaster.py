@@ -0,0 +1,44 @@
+import math
+
+import numpy as np
+import pytest
+
+from yield_forecaster import YieldForecaster
+
+
+def simulate(per_day, days=120, volatility=0.30, drift=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    forecaster = YieldForecaster(prior_volatility=0.1)
+    dt = 1 / per_day
+    value = 0.05
+    for i in range(int(days * per_day)):
+        value *= math.exp(drift * dt / 365 + rng.normal(0, volatility * math.sqrt(dt / 365)))
+        forecaster.update(value, i * dt * 86400)
+    return forecaster
+
+
+@pytest.mark.parametrize("per_day", [1, 24, 288])
+def test_volatility_does_not_depend_on_tick_frequency(per_day):
+    assert simulate(per_day).volatility == pytest.approx(0.30, rel=0.2)
+
+
+def test_confidence_does_not_grow_with_tick_frequency():
+    daily = simulate(1).confidence(91)
+    hourly = simulate(24).confidence(91)
+    assert hourly == pytest.approx(daily, abs=0.05)
+
+
+def test_drift_is_recovered():
+    forecaster = simulate(1, days=365, volatility=0.05, drift=0.5)
+    assert forecaster.forecast(365) / forecaster.forecast(0) == pytest.approx(math.exp(0.5), rel=0.15)
+
+
+def test_redelivered_observations_are_not_counted():
+    forecaster = YieldForecaster()
+    forecaster.update(0.05, 0)
+    forecaster.update(0.06, 86400)
+    state = (forecaster.variance, forecaster.drift, forecaster.observations)
+    forecaster.update(0.061, 86400)
+    forecaster.revise(0.062)
+    assert (forecaster.variance, forecaster.drift, forecaster.observations) == state
+    assert forecaster.predictions()["current"] == 0.062
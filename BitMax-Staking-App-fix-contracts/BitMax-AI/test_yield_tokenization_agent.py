@@ -0,0 +1,51 @@
+import pytest
+
+from yield_tokenization_agent import YieldTokenizationAgent
+
+SNAPSHOT = {
+    "btc_yield": 0.045,
+    "core_yield": 0.078,
+    "pt_btc_price": 0.957,
+    "pt_core_price": 0.928,
+    "yt_btc_price": 0.043,
+    "yt_core_price": 0.072,
+    "as_of": "2026-10-19",
+    "available_maturities": ["2026-01-01", "2026-12-31", "2027-12-31", "2028-12-31"],
+    "pt_btc_prices": {"2026-12-31": 0.995, "2027-06-30": 0.97, "2027-12-31": 0.95},
+}
+
+
+def agent(horizon):
+    agent = YieldTokenizationAgent({"risk_tolerance": "high", "investment_horizon": horizon, "financial_goal": "high_growth"})
+    agent.load_market_data(dict(SNAPSHOT))
+    return agent
+
+
+def test_expired_maturity_is_not_priced():
+    assert agent("long")._maturity_roi("YT-BTC", "2026-01-01") is None
+    assert "2026-01-01" not in [m["maturity"] for m in agent("long").rank_maturities("YT-BTC")]
+
+
+def test_maturity_roi_runs_to_maturity_not_past_it():
+    long_agent = agent("long")
+    # The 2026-12-31 maturity is ~0.2 years out: a 1 or 3 year horizon earns the same
+    to_maturity = long_agent._maturity_roi("YT-BTC", "2026-12-31", horizon_years=1)
+    assert long_agent._maturity_roi("YT-BTC", "2026-12-31", horizon_years=3) == pytest.approx(to_maturity)
+    assert to_maturity < long_agent._maturity_roi("YT-BTC", "2026-12-31")
+
+
+def test_short_maturity_yt_does_not_dominate_long_horizon():
+    recommended = agent("long").recommend_strategy()["recommended"]
+    assert recommended["expected_roi"] < 50
+
+
+
+def test_reloading_without_timestamp_keeps_forecast_state():
+    a = YieldTokenizationAgent()
+    snapshot = {k: v for k, v in SNAPSHOT.items() if k != "as_of"}
+    a.load_market_data(snapshot)
+    before = (a.forecasters["btc"].volatility, dict(a.prediction_confidence))
+    for _ in range(200):
+        a.load_market_data(snapshot)
+    assert (a.forecasters["btc"].volatility, a.prediction_confidence) == before
+    assert a.forecasters["btc"].observations == 1
@@ -0,0 +1,124 @@
+import math
+from typing import Dict, Optional
+
+# Forecast horizons, in days
+HORIZONS = {
+    "1m": 30,
+    "3m": 91,
+    "6m": 182,
+}
+
+# Spacing assumed between observations that carry no timestamp
+DEFAULT_PERIOD_DAYS = 1.0
+
+# Observations needed before estimates are trusted over the priors
+WARMUP_OBSERVATIONS = 10
+
+
+class YieldForecaster:
+    """
+    Streaming forecaster for a single yield series.
+
+    Keeps time-decayed EWMA estimates of the yield level, its log drift and
+    the variance of its log changes, so each new observation is O(1)
+    regardless of how much history has been seen. Observations can be
+    irregularly spaced; decay is applied per elapsed day.
+    """
+
+    def __init__(
+        self,
+        halflife_days: float = 30.0,
+        prior_drift: float = 0.0,
+        prior_volatility: float = 0.1,
+    ):
+        """
+        Args:
+            halflife_days: Half-life of the EWMA weights, in days
+            prior_drift: Annual log growth assumed before data arrives
+            prior_volatility: Annualized relative volatility assumed before data arrives
+        """
+        self.halflife_days = halflife_days
+        self.level: Optional[float] = None
+        self.drift = prior_drift / 365            # log change per day
+        self.variance = prior_volatility ** 2 / 365  # log-change variance per day
+        self.observations = 0
+        self.last_value: Optional[float] = None
+        self.last_timestamp: Optional[float] = None
+
+    def update(self, value: float, timestamp: Optional[float] = None) -> None:
+        """
+        Add a yield observation.
+
+        Args:
+            value: Observed yield
+            timestamp: Observation time in seconds; consecutive observations
+                without one are DEFAULT_PERIOD_DAYS apart
+        """
+        if self.last_value is None:
+            self.level = value
+            self.last_value = value
+            self.last_timestamp = timestamp
+            self.observations = 1
+            return
+
+        if timestamp is not None and self.last_timestamp is not None:
+            dt = (timestamp - self.last_timestamp) / 86400
+        else:
+            dt = DEFAULT_PERIOD_DAYS
+        if dt <= 0:
+            self.revise(value)
+            return
+
+        alpha = 1 - 0.5 ** (dt / self.halflife_days)
+        level = self.level + alpha * (value - self.level)
+        if value > 0 and self.last_value > 0 and level > 0 and self.level > 0:
+            # Drift follows the smoothed level so tick noise doesn't masquerade as trend
+            self.drift += alpha * (math.log(level / self.level) / dt - self.drift)
+            # Variance rate per day; alpha already weights the sample by elapsed time
+            log_change = math.log(value / self.last_value)
+            self.variance += alpha * (log_change ** 2 / dt - self.variance)
+        self.level = level
+        self.last_value = value
+        self.last_timestamp = timestamp
+        self.observations += 1
+
+    def revise(self, value: float) -> None:
+        """
+        Replace the latest observation without counting a new one.
+
+        Used when the same point in time is re-delivered, e.g. a snapshot
+        reloaded without a timestamp; drift, variance and the observation
+        count are left untouched.
+        """
+        if self.last_value is None:
+            self.update(value)
+            return
+        self.level += value - self.last_value
+        self.last_value = value
+
+    @property
+    def volatility(self) -> float:
+        """Annualized relative volatility of the yield."""
+        return math.sqrt(self.variance * 365)
+
+    def forecast(self, days: float) -> float:
+        """Expected yield the given number of days ahead."""
+        if self.last_value is None:
+            raise ValueError("No observations")
+        # Start from the latest value, nudged toward the smoothed level
+        base = 0.5 * (self.last_value + self.level)
+        return base * math.exp(self.drift * days)
+
+    def confidence(self, days: float) -> float:
+        """Confidence (0-1) in a forecast, shrinking with horizon, volatility and lack of data."""
+        spread = self.volatility * math.sqrt(days / 365)
+        warmup = self.observations / (self.observations + WARMUP_OBSERVATIONS)
+        return max(0.05, min(0.99, (1 - spread) * (0.5 + 0.5 * warmup)))
+
+    def predictions(self) -> Dict:
+        """Forecasts in the format used by YieldTokenizationAgent.yield_predictions."""
+        result = {"current": self.last_value}
+        for name, days in HORIZONS.items():
+            result[f"{name}_forecast"] = self.forecast(days)
+        result["volatility"] = self.volatility
+        return result
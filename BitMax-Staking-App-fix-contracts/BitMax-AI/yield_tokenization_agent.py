@@ -3,6 +3,17 @@ import numpy as np
 from typing import Dict, List, Tuple, Optional, Any, Union
 import logging
 from datetime import datetime, timedelta
+from term_structure import (
+    DEFAULT_SCENARIOS,
+    fit_curve,
+    flat_curve,
+    period_return,
+    price_term_structure,
+    to_timestamp,
+    valid_pt_price,
+    years_to_maturity,
+)
+from yield_forecaster import HORIZONS, YieldForecaster
 
 # Configure logging
 logging.basicConfig(
@@ -12,6 +23,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Best-ranked maturities per token turned into maturity-specific strategies
+MATURITY_STRATEGIES_PER_TOKEN = 1
+
+# Forecaster priors (annualized), used until enough yield observations arrive
+FORECAST_PRIORS = {
+    "btc": {"prior_drift": 0.10, "prior_volatility": 0.08},
+    "core": {"prior_drift": 0.12, "prior_volatility": 0.12},
+}
+
 class YieldTokenizationAgent:
     """Agent for optimizing and managing yield tokenization strategies."""
     
@@ -21,12 +41,18 @@ class YieldTokenizationAgent:
         self.market_data = None
         self.yield_predictions = None
         self.current_positions = None
+        self.term_structure = None
+        self.forecasters = {asset: YieldForecaster(**prior) for asset, prior in FORECAST_PRIORS.items()}
         logger.info("YieldTokenizationAgent initialized")
         
     def load_market_data(self, market_data: Dict) -> None:
         """
         Load current market data including PT/YT prices and yields.
         
+        Snapshots with an "as_of" time add an observation to the yield
+        forecasters; without one they only revise the latest value, so feed
+        history through record_yields.
+
         Args:
             market_data: Dictionary containing market data
         """
@@ -34,6 +60,7 @@ class YieldTokenizationAgent:
         self.market_data = market_data
         # Update yield predictions based on new market data
         self._update_yield_predictions()
+        self._update_term_structure()
         
     def set_user_profile(self, profile: Dict) -> None:
         """
@@ -55,45 +82,162 @@ class YieldTokenizationAgent:
         logger.info(f"Registering {len(positions)} positions")
         self.current_positions = positions
         
+    def record_yields(self, btc_yield: float, core_yield: float, timestamp: Optional[float] = None) -> None:
+        """
+        Feed a yield observation to the streaming forecasters.
+
+        Args:
+            btc_yield: Current BTC yield
+            core_yield: Current CORE yield
+            timestamp: Observation time in seconds, if known
+        """
+        self.forecasters["btc"].update(btc_yield, timestamp)
+        self.forecasters["core"].update(core_yield, timestamp)
+
     def _update_yield_predictions(self) -> None:
-        """Update yield predictions based on market data and trends."""
+        """Update yield predictions from the streaming forecasters."""
         if not self.market_data:
             logger.warning("Cannot update yield predictions: No market data available")
             return
             
         logger.info("Updating yield predictions")
         
-        # More deterministic prediction model based on current yields and time horizons
-        # In a real model, this would use more sophisticated forecasting
-        btc_yield_current = self.market_data["btc_yield"]
-        core_yield_current = self.market_data["core_yield"]
+        as_of = self.market_data.get("as_of")
+        if as_of is not None:
+            self.record_yields(self.market_data["btc_yield"], self.market_data["core_yield"], to_timestamp(as_of))
+        else:
+            # Without a timestamp a reload can't be told apart from a new day; only
+            # record_yields adds history, a bare snapshot just revises the latest value
+            self.forecasters["btc"].revise(self.market_data["btc_yield"])
+            self.forecasters["core"].revise(self.market_data["core_yield"])
         
-        # Use more deterministic modeling for predictions instead of random
-        # Short-term yields tend to be more predictable, long-term have more variance
         self.yield_predictions = {
-            "btc": {
-                "current": btc_yield_current,
-                "1m_forecast": btc_yield_current * 1.01,  # 1% expected increase in 1 month
-                "3m_forecast": btc_yield_current * 1.03,  # 3% expected increase in 3 months
-                "6m_forecast": btc_yield_current * 1.05,  # 5% expected increase in 6 months
-                "volatility": 0.08  # 8% expected volatility
-            },
-            "core": {
-                "current": core_yield_current,
-                "1m_forecast": core_yield_current * 1.015,  # 1.5% expected increase in 1 month
-                "3m_forecast": core_yield_current * 1.04,   # 4% expected increase in 3 months
-                "6m_forecast": core_yield_current * 1.06,   # 6% expected increase in 6 months
-                "volatility": 0.12  # 12% expected volatility
-            }
+            asset: forecaster.predictions() for asset, forecaster in self.forecasters.items()
         }
         
-        # Add confidence metrics to our predictions
+        # Confidence per horizon, averaged over both assets
         self.prediction_confidence = {
-            "1m": 0.9,  # 90% confidence in 1-month predictions
-            "3m": 0.75, # 75% confidence in 3-month predictions
-            "6m": 0.6   # 60% confidence in 6-month predictions
+            name: sum(f.confidence(days) for f in self.forecasters.values()) / len(self.forecasters)
+            for name, days in HORIZONS.items()
         }
         
+    def _update_term_structure(self) -> None:
+        """
+        Fit PT yield curves and price every available maturity under each scenario.
+
+        Per-maturity PT quotes are read from "pt_btc_prices" / "pt_core_prices"
+        (maturity -> price); without them the curve is flat at the current yield.
+        """
+        maturities = self.market_data.get("available_maturities") or []
+        if not maturities:
+            self.term_structure = None
+            return
+
+        logger.info(f"Pricing term structure for {len(maturities)} maturities")
+        as_of = self.market_data.get("as_of")
+        years = years_to_maturity(maturities, as_of)
+        self.term_structure = {
+            "maturities": list(maturities),
+            "index": {maturity: i for i, maturity in enumerate(maturities)},
+            "years": years,
+            "scenarios": {name: i for i, name in enumerate(DEFAULT_SCENARIOS)},
+        }
+        for asset in ("btc", "core"):
+            underlying_yield = self.market_data[f"{asset}_yield"]
+            quotes = self._usable_quotes(asset, as_of)
+            if quotes:
+                curve = fit_curve(years_to_maturity(list(quotes), as_of), list(quotes.values()))
+            else:
+                curve = flat_curve(underlying_yield)
+            self.term_structure[asset] = price_term_structure(
+                curve, years, underlying_yield, list(DEFAULT_SCENARIOS.values())
+            )
+
+    def _usable_quotes(self, asset: str, as_of: Any) -> Dict:
+        """PT quotes for an asset, without invalid prices or expired maturities."""
+        quotes = self.market_data.get(f"pt_{asset}_prices") or {}
+        if not quotes:
+            return {}
+        years = years_to_maturity(list(quotes), as_of)
+        usable = {
+            maturity: price
+            for (maturity, price), remaining in zip(quotes.items(), years)
+            if remaining > 0 and valid_pt_price(price)
+        }
+        if len(usable) < len(quotes):
+            logger.warning(f"Ignoring {len(quotes) - len(usable)} expired or invalid PT-{asset.upper()} quotes")
+        return usable
+
+    def _maturity_roi(
+        self,
+        token: str,
+        maturity: Any,
+        scenario: str = "base",
+        horizon_years: Optional[float] = None,
+    ) -> Optional[float]:
+        """
+        ROI (%) of a PT/YT token for the given maturity, None if unpriced or expired.
+
+        Annualized by default; with horizon_years, the return earned over
+        min(horizon_years, time to maturity) instead.
+        """
+        if not self.term_structure or maturity not in self.term_structure["index"]:
+            return None
+        kind, asset = token.lower().split("-", 1)
+        pricing = self.term_structure.get(asset)
+        if pricing is None:
+            return None
+        row = self.term_structure["scenarios"][scenario]
+        col = self.term_structure["index"][maturity]
+        years = self.term_structure["years"][col]
+        if years <= 0:
+            return None
+        roi = float(pricing[f"{kind}_roi"][row, col])
+        if horizon_years is not None:
+            roi = float(period_return(roi, min(horizon_years, years)))
+        return roi * 100
+
+    def rank_maturities(
+        self,
+        token: str,
+        scenario: str = "base",
+        top_n: Optional[int] = None,
+        max_years: Optional[float] = None,
+    ) -> List[Dict]:
+        """
+        Rank unexpired maturities of a token by annualized hold-to-maturity ROI.
+
+        Args:
+            token: Token type, e.g. "PT-BTC" or "YT-CORE"
+            scenario: Yield scenario name (bear, base, bull)
+            top_n: Number of maturities to return, all if None
+            max_years: Only consider maturities at most this far out
+
+        Returns:
+            List of dictionaries with maturity, price and expected ROI, best first
+        """
+        if not self.term_structure:
+            logger.warning("Cannot rank maturities: No term structure available")
+            return []
+
+        kind, asset = token.lower().split("-", 1)
+        pricing = self.term_structure[asset]
+        row = self.term_structure["scenarios"][scenario]
+        roi = pricing[f"{kind}_roi"][row]
+        price = pricing[f"{kind}_price"][row]
+        years = self.term_structure["years"]
+        live = np.flatnonzero((years > 0) & (years <= (max_years if max_years is not None else np.inf)))
+        order = live[np.argsort(-roi[live], kind="stable")][:top_n]
+        maturities = self.term_structure["maturities"]
+        return [
+            {
+                "maturity": maturities[i],
+                "price": round(float(price[i]), 6),
+                "expected_roi": round(float(roi[i]) * 100, 2),
+            }
+            for i in order
+        ]
+
     def _calculate_expected_returns(self, strategy: Dict) -> Dict:
         """
         Calculate expected returns for a given strategy.
@@ -152,8 +296,17 @@ class YieldTokenizationAgent:
             # Calculate impact based on action type
             impact_factor = 1.0 if action_type == "buy" else -0.5 if action_type == "sell" else 0
             
+            # Maturity-specific actions are priced off the term structure, over
+            # the horizon or until maturity, whichever comes first
+            period_roi = (
+                self._maturity_roi(token, action["maturity"], horizon_years=horizon_factor)
+                if "maturity" in action else None
+            )
+            if period_roi is None:
+                period_roi = roi_expectations.get(token, 0) * horizon_factor
+            
             # Add to expected ROI and risk
-            expected_roi += roi_expectations.get(token, 0) * percentage * impact_factor * horizon_factor
+            expected_roi += period_roi * percentage * impact_factor
             risk_score += risk_weights.get(token, 0.5) * percentage * abs(impact_factor)
         
         # Adjust ROI based on risk tolerance
@@ -304,6 +457,55 @@ class YieldTokenizationAgent:
                                           not action["token"].startswith("PT")]
                     strategy["description"] += " while seeking growth opportunities"
         
+        strategies.extend(self._generate_maturity_strategies())
+        
+        return strategies
+        
+    def _generate_maturity_strategies(self) -> List[Dict]:
+        """
+        Generate strategies that target the best-ranked maturity of each token.
+
+        Only maturities within the user's investment horizon are considered.
+        
+        Returns:
+            List of maturity-specific strategy dictionaries
+        """
+        if not self.term_structure:
+            return []
+            
+        horizon_years = {
+            "short": 0.25,
+            "medium": 1,
+            "long": 3
+        }.get(self.user_profile.get("investment_horizon", "medium"), 1)
+        
+        strategies = []
+        for token in ("PT-BTC", "PT-CORE", "YT-BTC", "YT-CORE"):
+            kind, asset = token.split("-")
+            counterpart = f"{'YT' if kind == 'PT' else 'PT'}-{asset}"
+            ranked = self.rank_maturities(token, top_n=MATURITY_STRATEGIES_PER_TOKEN, max_years=horizon_years)
+            for entry in ranked:
+                maturity = entry["maturity"]
+                if kind == "PT":
+                    strategies.append({
+                        "name": f"Fixed Rate {token} {maturity}",
+                        "description": f"Lock in the implied {asset} yield with PT maturing {maturity}",
+                        "actions": [
+                            {"action": "sell", "token": counterpart, "percentage": 50},
+                            {"action": "buy", "token": token, "percentage": 50, "maturity": maturity}
+                        ],
+                        "rationale": f"Highest implied PT yield ({entry['expected_roi']}%) within your horizon"
+                    })
+                else:
+                    strategies.append({
+                        "name": f"Yield Exposure {token} {maturity}",
+                        "description": f"Take {asset} yield exposure through YT maturing {maturity}",
+                        "actions": [
+                            {"action": "sell", "token": counterpart, "percentage": 50},
+                            {"action": "buy", "token": token, "percentage": 50, "maturity": maturity}
+                        ],
+                        "rationale": f"Best expected YT return ({entry['expected_roi']}%) within your horizon"
+                    })
         return strategies
         
     def _rank_strategies(self, strategies: List[Dict]) -> List[Dict]: